@@ -9,18 +9,24 @@ import sys
 import os
 import re
 import json
+import mmap
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
 from datetime import datetime, date
+from html import escape
 from pathlib import Path
 
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-    QPushButton, QLabel, QFileDialog, QDateEdit, QTextEdit,
+    QPushButton, QLabel, QFileDialog, QDateEdit, QTextEdit, QPlainTextEdit,
     QListWidget, QListWidgetItem, QGroupBox, QSplitter,
     QProgressBar, QMessageBox, QComboBox, QTabWidget, QScrollArea
 )
 from PyQt6.QtCore import Qt, QThread, pyqtSignal, QDate
 from PyQt6.QtGui import QFont, QColor
 
+import numpy as np
 from dateutil import parser as dateparser
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
@@ -33,71 +39,274 @@ from reportlab.lib import colors
 # WhatsApp Parser
 # ─────────────────────────────────────────────
 
-WHATSAPP_MSG_RE = re.compile(
-    r"^(\d{1,2}[./]\d{1,2}[./]\d{2,4}),\s*(\d{1,2}:\d{2}(?::\d{2})?(?:\s?[APap][Mm])?)\s*[-–]\s*([^:]+):\s*(.*)$"
+# Günstiger Substring-Test vor AUDIO_RE; beide aus derselben Endungsliste
+_AUDIO_EXTS = (".opus", ".ogg", ".mp3", ".m4a", ".aac", ".wav")
+AUDIO_RE = re.compile(
+    r"<?(\S+\.(?:%s))>?" % "|".join(ext[1:] for ext in _AUDIO_EXTS), re.IGNORECASE
 )
-AUDIO_RE = re.compile(r"<?(\S+\.(?:opus|ogg|mp3|m4a|aac|wav))>?", re.IGNORECASE)
 
 
-def parse_whatsapp_export(filepath: str) -> list[dict]:
-    """Parst eine WhatsApp-Exportdatei und gibt eine Liste von Nachrichten zurück."""
-    messages = []
-    base_dir = Path(filepath).parent
+def _parse_header(line: str) -> tuple[str, str, str, str] | None:
+    """Zerlegt eine Kopfzeile "dd.mm.yy, HH:MM - Absender: Text" ohne Regex.
+
+    Gibt (Datum, Uhrzeit, Absender, Text) zurück oder None, wenn die Zeile
+    keine Kopfzeile ist.
+    """
+    i = line.find(",")
+    if i < 0:
+        return None
+    # Erstes "-" oder "–" nach dem Komma trennt Uhrzeit und Absender; ein
+    # Bindestrich im Nachrichtentext darf das "–" nicht verdecken
+    hyphen = line.find("-", i)
+    en_dash = line.find("–", i)
+    if hyphen < 0 and en_dash < 0:
+        return None
+    j = en_dash if hyphen < 0 or 0 <= en_dash < hyphen else hyphen
+    k = line.find(":", j + 1)
+    if k < 0:
+        return None
+
+    date_str = line[:i]
+    parts = date_str.replace("/", ".").split(".")
+    if (len(parts) != 3 or not all(p.isdigit() for p in parts)
+            or len(parts[0]) > 2 or len(parts[1]) > 2 or not 2 <= len(parts[2]) <= 4):
+        return None
+
+    time_str = line[i + 1:j].strip()
+    clock = time_str
+    if clock[-2:].lower() in ("am", "pm"):
+        clock = clock[:-2].rstrip()
+    parts = clock.split(":")
+    if (len(parts) not in (2, 3) or not all(p.isdigit() for p in parts)
+            or len(parts[0]) > 2 or any(len(p) != 2 for p in parts[1:])):
+        return None
+
+    # Leerraum um Komma und Strich ist optional, wie im früheren Regex
+    sender = line[j + 1:k].strip()
+    if j + 1 == k or len(sender) > 64:
+        return None
+
+    return date_str, time_str, sender, line[k + 1:].lstrip()
+
+
+def _datetime_formats(date_str: str, time_str: str) -> list[str]:
+    """Leitet die strptime-Formate aus Datum und Uhrzeit einer Kopfzeile ab.
+
+    Tag zuerst (wie dayfirst=True), danach die US-Reihenfolge.
+    """
+    sep = "." if "." in date_str else "/"
+    year = "%Y" if len(date_str.rsplit(sep, 1)[-1]) == 4 else "%y"
+    clock = "%H:%M:%S" if time_str.count(":") == 2 else "%H:%M"
+    # Neuere Exporte setzen U+202F statt eines Leerzeichens vor AM/PM;
+    # das Leerzeichen im Format matcht bei strptime jedes Whitespace-Zeichen
+    if time_str[-1:] in ("m", "M"):
+        clock = clock.replace("%H", "%I") + (" %p" if time_str[-3:-2].isspace() else "%p")
+    return [f"%d{sep}%m{sep}{year} {clock}", f"%m{sep}%d{sep}{year} {clock}"]
+
+
+def _parse_datetime(date_str: str, time_str: str, formats: list[str]) -> datetime | None:
+    """Wandelt Datum und Uhrzeit per strptime um, dateutil nur als Fallback.
+
+    Das zuletzt passende Format wird in ``formats`` nach vorne sortiert.
+    """
+    value = f"{date_str} {time_str}"
+    for i, fmt in enumerate(formats):
+        try:
+            dt = datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+        if i:
+            formats.insert(0, formats.pop(i))
+        return dt
+    # Anderes Format als die bisherigen Kopfzeilen – einmal neu ableiten
+    for fmt in _datetime_formats(date_str, time_str):
+        if fmt in formats:
+            continue
+        try:
+            dt = datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+        formats.insert(0, fmt)
+        return dt
+    try:
+        return dateparser.parse(value, dayfirst=True)
+    except Exception:
+        return None
 
-    with open(filepath, "r", encoding="utf-8", errors="replace") as f:
-        lines = f.readlines()
-
-    current_msg = None
-    for line in lines:
-        line = line.rstrip("\n")
-        m = WHATSAPP_MSG_RE.match(line)
-        if m:
-            if current_msg:
-                messages.append(current_msg)
-            date_str, time_str, sender, text = m.groups()
-            try:
-                dt = dateparser.parse(f"{date_str} {time_str}", dayfirst=True)
-            except Exception:
-                dt = None
-
-            audio_match = AUDIO_RE.search(text)
-            audio_file = None
-            if audio_match:
-                candidate = base_dir / audio_match.group(1)
-                if candidate.exists():
-                    audio_file = str(candidate)
 
-            current_msg = {
+def _iter_lines(filepath: str):
+    """Liefert die Zeilen der Datei per mmap, jede erst bei Bedarf dekodiert."""
+    with open(filepath, "rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Leere Dateien lassen sich nicht mappen
+            return
+        with mm:
+            start = 0
+            size = len(mm)
+            while start < size:
+                nl = mm.find(b"\n", start)
+                if nl < 0:
+                    nl = size
+                yield mm[start:nl].decode("utf-8", errors="replace").rstrip("\r")
+                start = nl + 1
+
+
+@dataclass(eq=False)
+class MessageStore:
+    """Nachrichten als parallele Spalten (SoA) statt als Liste von Dicts."""
+    datetimes: np.ndarray = field(default_factory=lambda: np.empty(0, "datetime64[s]"))
+    sender_ids: np.ndarray = field(default_factory=lambda: np.empty(0, np.int32))
+    sender_names: list[str] = field(default_factory=list)   # Reihenfolge des ersten Auftretens
+    texts: list[str] = field(default_factory=list)
+    audio_files: list[str | None] = field(default_factory=list)
+    transcripts: list[str | None] = field(default_factory=list)
+    prefixes: list[str] = field(default_factory=list)       # Zeilenpräfix für den Originalverlauf
+    pdf_headers: list[str] = field(default_factory=list)    # Absender/Zeit-Zeile im PDF
+    pdf_bodies: list[str] = field(default_factory=list)     # für ReportLab maskierter Text
+    has_audio: np.ndarray = field(init=False, repr=False)
+    _order: np.ndarray = field(init=False, repr=False)
+    _sorted_days: np.ndarray = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.has_audio = np.fromiter((f is not None for f in self.audio_files),
+                                     dtype=bool, count=len(self.audio_files))
+        # Stabil nach Tag sortiert, damit searchsorted auch bei unsortierten
+        # Exporten greift (NaT landet am Ende)
+        days = self.datetimes.astype("datetime64[D]")
+        self._order = np.argsort(days, kind="stable")
+        self._sorted_days = days[self._order]
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def to_dict_view(self, idx: np.ndarray) -> list[dict]:
+        """Liefert die Nachrichten ``idx`` als Dicts (z. B. für den PDF-Export)."""
+        names = self.sender_names
+        return [
+            {
                 "datetime": dt,
-                "sender": sender.strip(),
-                "text": text.strip(),
-                "audio_file": audio_file,
-                "transcript": None,
+                "sender": names[sid],
+                "text": self.texts[i],
+                "audio_file": self.audio_files[i],
+                "transcript": self.transcripts[i],
+                "_prefix": self.prefixes[i],
+                "_pdf_header": self.pdf_headers[i],
+                "_pdf_body_html": self.pdf_bodies[i],
             }
-        else:
-            if current_msg:
-                current_msg["text"] += " " + line.strip()
-
-    if current_msg:
-        messages.append(current_msg)
-
-    return messages
+            for i, dt, sid in zip(idx.tolist(), self.datetimes[idx].tolist(),
+                                  self.sender_ids[idx].tolist())
+        ]
+
+
+def parse_whatsapp_export(filepath: str) -> MessageStore:
+    """Parst eine WhatsApp-Exportdatei in einen MessageStore."""
+    datetimes: list[datetime | None] = []
+    sender_ids: list[int] = []
+    texts: list[str] = []
+    audio_files: list[str | None] = []
+    prefixes: list[str] = []
+    pdf_headers: list[str] = []
+    pdf_bodies: list[str] = []
+    sender_to_id: dict[str, int] = {}
 
-
-def filter_messages(messages: list[dict], start: date, end: date,
-                    senders: list[str] | None = None) -> list[dict]:
-    """Filtert Nachrichten nach Zeitraum und optionalen Absendern."""
-    result = []
-    for msg in messages:
-        if msg["datetime"] is None:
-            continue
-        msg_date = msg["datetime"].date()
-        if not (start <= msg_date <= end):
-            continue
-        if senders and msg["sender"] not in senders:
-            continue
-        result.append(msg)
-    return result
+    base_dir = Path(filepath).parent
+    # Einmal das Verzeichnis lesen statt pro Sprachnachricht exists() aufzurufen
+    try:
+        existing = set(os.listdir(base_dir))
+    except OSError:
+        existing = None
+
+    formats: list[str] | None = None    # aus der ersten Kopfzeile abgeleitet
+    # (Datum, Uhrzeit) -> (datetime, formatierter Zeitstempel)
+    dt_cache: dict[tuple[str, str], tuple[datetime | None, str]] = {}
+
+    # Zeilen der aktuellen Nachricht, erst bei der nächsten Kopfzeile verbunden
+    text_parts: list[str] | None = None
+
+    def finish_text():
+        text = " ".join(text_parts)
+        texts.append(text)
+        pdf_bodies.append(escape(text, quote=False))
+
+    for line in _iter_lines(filepath):
+        # Kopfzeilen beginnen immer mit einer Ziffer – Folgezeilen und
+        # Leerzeilen müssen gar nicht erst zerlegt werden
+        header = _parse_header(line) if line[:1].isdigit() else None
+        if header:
+            if text_parts is not None:
+                finish_text()
+            date_str, time_str, sender, text = header
+            # Aufeinanderfolgende Nachrichten teilen sich oft dieselbe Minute
+            key = (date_str, time_str)
+            if key in dt_cache:
+                dt, dt_str = dt_cache[key]
+            else:
+                if formats is None:
+                    formats = _datetime_formats(date_str, time_str)
+                dt = _parse_datetime(date_str, time_str, formats)
+                dt_str = dt.strftime("%d.%m.%Y %H:%M") if dt else ""
+                dt_cache[key] = dt, dt_str
+
+            # Regex nur starten, wenn überhaupt eine Audio-Endung vorkommt
+            audio_match = None
+            if "." in text:
+                lowered = text.lower()
+                if any(ext in lowered for ext in _AUDIO_EXTS):
+                    audio_match = AUDIO_RE.search(text)
+            audio_file = None
+            if audio_match:
+                name = audio_match.group(1)
+                # Verweise mit Unterordner stehen nicht im Listing des Exportordners
+                if existing is not None and "/" not in name and os.sep not in name:
+                    if name in existing:
+                        audio_file = str(base_dir / name)
+                elif (base_dir / name).exists():
+                    audio_file = str(base_dir / name)
+
+            sender = sender.strip()
+            datetimes.append(dt)
+            sender_ids.append(sender_to_id.setdefault(sender, len(sender_to_id)))
+            audio_files.append(audio_file)
+            prefixes.append(f"[{dt_str}] {sender}: ")
+            pdf_headers.append(f"<b>{escape(sender, quote=False)}</b> "
+                               f"<font size='8' color='grey'>{dt_str}</font>")
+            text_parts = [text.strip()]
+        elif text_parts is not None:
+            text_parts.append(line.strip())
+
+    if text_parts is not None:
+        finish_text()
+
+    return MessageStore(
+        datetimes=np.array(datetimes, dtype="datetime64[s]"),
+        sender_ids=np.array(sender_ids, dtype=np.int32),
+        sender_names=list(sender_to_id),
+        texts=texts,
+        audio_files=audio_files,
+        transcripts=[None] * len(texts),
+        prefixes=prefixes,
+        pdf_headers=pdf_headers,
+        pdf_bodies=pdf_bodies,
+    )
+
+
+def filter_messages(store: MessageStore, start: date, end: date,
+                    senders: list[str] | None = None) -> np.ndarray:
+    """Filtert Nachrichten nach Zeitraum und optionalen Absendern.
+
+    Gibt die Indizes der passenden Nachrichten in Dateireihenfolge zurück.
+    """
+    days = store._sorted_days
+    lo = np.searchsorted(days, np.datetime64(start, "D"), side="left")
+    hi = np.searchsorted(days, np.datetime64(end, "D"), side="right")
+    # Zurück in die Reihenfolge der Exportdatei
+    idx = np.sort(store._order[lo:hi])
+    if senders:
+        allowed = [i for i, name in enumerate(store.sender_names) if name in senders]
+        idx = idx[np.isin(store.sender_ids[idx], allowed)]
+    return idx
 
 
 # ─────────────────────────────────────────────
@@ -110,50 +319,81 @@ class TranscriptionWorker(QThread):
     finished = pyqtSignal()
     error = pyqtSignal(str)
 
-    def __init__(self, messages: list[dict]):
+    def __init__(self, jobs: list[tuple[int, str]], model_size: str = "tiny", model=None):
         super().__init__()
-        self.messages = messages
+        self.jobs = jobs    # (Index im MessageStore, Audiodatei)
+        self.model_size = model_size
+        # Bereits geladenes Modell derselben Größe; sonst lädt run() es
+        self.model = model
 
     def run(self):
         try:
-            import whisper
-            model = whisper.load_model("base")
+            import ctranslate2
+            from faster_whisper import WhisperModel, BatchedInferencePipeline
+            # Auf der GPU lastet eine Batch-Pipeline das Gerät bereits aus;
+            # auf der CPU läuft pro Datei ein Worker (ein Kern bleibt frei)
+            on_gpu = ctranslate2.get_cuda_device_count() > 0
+            cores = max(1, (os.cpu_count() or 2) - 1)
+            if self.model is None:
+                # Das Modell hängt nicht von der Zahl der Dateien ab, damit es
+                # für alle weiteren Läufe derselben Größe wiederverwendet wird:
+                # ein CTranslate2-Worker mit je einem Thread pro Kern
+                options = {} if on_gpu else {"cpu_threads": 1, "num_workers": cores}
+                self.model = WhisperModel(self.model_size, device="auto", compute_type="int8",
+                                          **options)
+            workers = 1 if on_gpu else max(1, min(len(self.jobs), cores))
+            batched = BatchedInferencePipeline(model=self.model)
         except Exception as e:
             self.error.emit(f"Whisper konnte nicht geladen werden: {e}")
             return
 
-        audio_msgs = [(i, m) for i, m in enumerate(self.messages) if m["audio_file"]]
-        total = len(audio_msgs)
+        total = len(self.jobs)
 
-        for idx, (i, msg) in enumerate(audio_msgs):
-            self.progress.emit(idx + 1, total)
-            try:
-                result = model.transcribe(msg["audio_file"])
-                self.message_done.emit(i, result["text"].strip())
-            except Exception as e:
-                self.message_done.emit(i, f"[Transkriptionsfehler: {e}]")
+        # CTranslate2 gibt die GIL frei, Threads laufen also wirklich parallel
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(self._transcribe_file, batched, path): i
+                for i, path in self.jobs
+            }
+            # Signale nur aus diesem Thread, daher braucht der Zähler kein Lock
+            for done, future in enumerate(as_completed(futures), start=1):
+                i = futures[future]
+                try:
+                    self.message_done.emit(i, future.result())
+                except Exception as e:
+                    self.message_done.emit(i, f"[Transkriptionsfehler: {e}]")
+                self.progress.emit(done, total)
 
         self.finished.emit()
 
+    @staticmethod
+    def _transcribe_file(batched, path: str) -> str:
+        # Segmente werden lazy erzeugt – erst das join() transkribiert
+        segments, _ = batched.transcribe(path, batch_size=16)
+        return "".join(seg.text for seg in segments).strip()
+
 
 # ─────────────────────────────────────────────
 # Zusammenfassungs-Funktion (lokal, regelbasiert)
 # ─────────────────────────────────────────────
 
-def generate_summary(messages: list[dict]) -> str:
-    """Erstellt eine einfache regelbasierte Zusammenfassung der Nachrichten."""
-    if not messages:
+def generate_summary(store: MessageStore, idx: np.ndarray) -> str:
+    """Erstellt eine einfache regelbasierte Zusammenfassung der Nachrichten ``idx``."""
+    if not idx.size:
         return "Keine Nachrichten im gewählten Zeitraum."
 
-    senders = {}
-    for msg in messages:
-        s = msg["sender"]
-        senders[s] = senders.get(s, 0) + 1
+    sender_ids = store.sender_ids[idx]
+    counts = np.bincount(sender_ids, minlength=len(store.sender_names))
+    # Reihenfolge des ersten Auftretens im Zeitraum, damit most_common()
+    # Gleichstände wie bisher auflöst
+    ids, first = np.unique(sender_ids, return_index=True)
+    names = store.sender_names
+    senders = Counter({names[sid]: int(counts[sid]) for sid in ids[np.argsort(first)].tolist()})
 
-    total = len(messages)
-    audio_count = sum(1 for m in messages if m["audio_file"])
-    start_dt = messages[0]["datetime"]
-    end_dt = messages[-1]["datetime"]
+    total = idx.size
+    audio_count = np.count_nonzero(store.has_audio[idx])
+    start_dt = store.datetimes[idx[0]].item()
+    end_dt = store.datetimes[idx[-1]].item()
 
     lines = [
         f"=== Zusammenfassung ===",
@@ -163,7 +403,7 @@ def generate_summary(messages: list[dict]) -> str:
         "",
         "Aktivität nach Teilnehmer:",
     ]
-    for sender, count in sorted(senders.items(), key=lambda x: -x[1]):
+    for sender, count in senders.most_common():
         lines.append(f"  • {sender}: {count} Nachrichten")
 
     lines += ["", "Hinweis: Für eine detaillierte KI-Zusammenfassung kann ein lokales"]
@@ -176,11 +416,16 @@ def generate_summary(messages: list[dict]) -> str:
 # PDF-Export
 # ─────────────────────────────────────────────
 
+# Maximale Anzahl Textnachrichten pro Paragraph im PDF
+PDF_BATCH_SIZE = 5
+
+
 def export_pdf(filepath: str, messages: list[dict], summary: str | None = None):
     """Exportiert die Nachrichten (und optionale Zusammenfassung) als PDF."""
     doc = SimpleDocTemplate(filepath, pagesize=A4,
                             rightMargin=2*cm, leftMargin=2*cm,
-                            topMargin=2*cm, bottomMargin=2*cm)
+                            topMargin=2*cm, bottomMargin=2*cm,
+                            invariant=1, allowSplitting=1)
     styles = getSampleStyleSheet()
     story = []
 
@@ -188,10 +433,13 @@ def export_pdf(filepath: str, messages: list[dict], summary: str | None = None):
                                  fontSize=16, spaceAfter=12)
     meta_style = ParagraphStyle("meta", parent=styles["Normal"],
                                 fontSize=9, textColor=colors.grey)
+    # spaceAfter ersetzt die früheren Spacer-Flowables zwischen den Nachrichten
     msg_style = ParagraphStyle("msg", parent=styles["Normal"],
-                               fontSize=10, spaceAfter=4, leading=14)
+                               fontSize=10, spaceAfter=10, leading=14)
+    header_style = ParagraphStyle("header", parent=msg_style,
+                                  spaceAfter=4, keepWithNext=1)
     transcript_style = ParagraphStyle("transcript", parent=styles["Normal"],
-                                      fontSize=10, spaceAfter=4,
+                                      fontSize=10, spaceAfter=10,
                                       textColor=colors.darkblue, leading=14)
     summary_style = ParagraphStyle("summary", parent=styles["Normal"],
                                    fontSize=10, leading=14, spaceAfter=6)
@@ -203,45 +451,78 @@ def export_pdf(filepath: str, messages: list[dict], summary: str | None = None):
         story.append(Paragraph(f"Zeitraum: {start} – {end} | {len(messages)} Nachrichten", meta_style))
     story.append(Spacer(1, 0.5*cm))
 
-    for msg in messages:
-        dt_str = msg["datetime"].strftime("%d.%m.%Y %H:%M") if msg["datetime"] else ""
-        header = f"<b>{msg['sender']}</b> <font size='8' color='grey'>{dt_str}</font>"
-        story.append(Paragraph(header, msg_style))
+    # Reine Textnachrichten werden zu einem Paragraph zusammengefasst,
+    # das spart ReportLab den Layout-Aufwand pro Flowable
+    batch: list[str] = []
 
+    def flush_batch():
+        if batch:
+            story.append(Paragraph("<br/><br/>".join(batch), msg_style))
+            batch.clear()
+
+    for msg in messages:
         if msg["audio_file"]:
+            flush_batch()
+            story.append(Paragraph(msg["_pdf_header"], header_style))
             if msg["transcript"]:
                 story.append(Paragraph(f"🎤 <i>{msg['transcript']}</i>", transcript_style))
             else:
                 story.append(Paragraph("🎤 [Sprachnachricht – nicht transkribiert]", transcript_style))
         else:
-            safe_text = msg["text"].replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
-            story.append(Paragraph(safe_text, msg_style))
-
-        story.append(Spacer(1, 0.2*cm))
+            batch.append(f"{msg['_pdf_header']}<br/>{msg['_pdf_body_html']}")
+            if len(batch) >= PDF_BATCH_SIZE:
+                flush_batch()
+    flush_batch()
 
     if summary:
         story.append(Spacer(1, 1*cm))
         story.append(Paragraph("Zusammenfassung", title_style))
         for line in summary.split("\n"):
-            safe_line = line.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
-            story.append(Paragraph(safe_line or "&nbsp;", summary_style))
+            story.append(Paragraph(escape(line, quote=False) or "&nbsp;", summary_style))
 
     doc.build(story)
 
 
+class PDFExportWorker(QThread):
+    finished = pyqtSignal(str)     # Pfad der erstellten Datei
+    error = pyqtSignal(str)
+
+    def __init__(self, path: str, messages: list[dict], summary: str | None):
+        super().__init__()
+        self.path = path
+        self.messages = messages
+        self.summary = summary
+
+    def run(self):
+        try:
+            export_pdf(self.path, self.messages, self.summary)
+        except Exception as e:
+            self.error.emit(str(e))
+            return
+        self.finished.emit(self.path)
+
+
 # ─────────────────────────────────────────────
 # Haupt-GUI
 # ─────────────────────────────────────────────
 
+# Wählbare Whisper-Modelle – "tiny" ist für kurze Sprachnachrichten schnell genug
+WHISPER_MODEL_SIZES = ("tiny", "base", "small")
+
+
 class WhatsAppAnalyzer(QMainWindow):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("WhatsApp Analyzer")
         self.setMinimumSize(1100, 750)
-        self.messages: list[dict] = []
-        self.filtered_messages: list[dict] = []
+        self.store = MessageStore()
+        self.filtered_idx: np.ndarray = np.empty(0, dtype=np.intp)
         self.summary_text: str | None = None
         self.worker: TranscriptionWorker | None = None
+        self.pdf_worker: PDFExportWorker | None = None
+        self._whisper_size = "tiny"
+        self._whisper_model = None
+        self._whisper_model_size: str | None = None
         self._build_ui()
 
     def _build_ui(self):
@@ -288,20 +569,30 @@ class WhatsAppAnalyzer(QMainWindow):
         # ── Schritt 3: Transkription ──
         grp_trans = QGroupBox("Schritt 3 – Sprachnachrichten transkribieren (Whisper, lokal)")
         lay_trans = QVBoxLayout(grp_trans)
+        lay_trans_row = QHBoxLayout()
+        lay_trans_row.addWidget(QLabel("Modell:"))
+        self.combo_model = QComboBox()
+        self.combo_model.addItems(WHISPER_MODEL_SIZES)
+        self.combo_model.setCurrentText(self._whisper_size)
+        self.combo_model.currentTextChanged.connect(self._set_whisper_size)
+        lay_trans_row.addWidget(self.combo_model)
         self.btn_transcribe = QPushButton("🎤 Transkription starten")
         self.btn_transcribe.clicked.connect(self._start_transcription)
+        lay_trans_row.addWidget(self.btn_transcribe, 1)
         self.progress_bar = QProgressBar()
         self.progress_bar.setVisible(False)
-        lay_trans.addWidget(self.btn_transcribe)
+        lay_trans.addLayout(lay_trans_row)
         lay_trans.addWidget(self.progress_bar)
         root_layout.addWidget(grp_trans)
 
         # ── Tabs: Original / Zusammenfassung ──
         self.tabs = QTabWidget()
 
-        self.txt_original = QTextEdit()
+        # QPlainTextEdit layoutet nur den sichtbaren Bereich – wichtig bei großen Chats
+        self.txt_original = QPlainTextEdit()
         self.txt_original.setReadOnly(True)
         self.txt_original.setFont(QFont("Courier", 10))
+        self.txt_original.document().setUndoRedoEnabled(False)
         self.tabs.addTab(self.txt_original, "📋 Originalverlauf")
 
         self.txt_summary = QTextEdit()
@@ -315,11 +606,11 @@ class WhatsAppAnalyzer(QMainWindow):
         lay_actions = QHBoxLayout(grp_actions)
         btn_summarize = QPushButton("📝 Zusammenfassung erstellen")
         btn_summarize.clicked.connect(self._create_summary)
-        btn_pdf = QPushButton("📄 PDF exportieren")
-        btn_pdf.clicked.connect(self._export_pdf)
+        self.btn_pdf = QPushButton("📄 PDF exportieren")
+        self.btn_pdf.clicked.connect(self._export_pdf)
         self.lbl_status = QLabel("")
         lay_actions.addWidget(btn_summarize)
-        lay_actions.addWidget(btn_pdf)
+        lay_actions.addWidget(self.btn_pdf)
         lay_actions.addStretch()
         lay_actions.addWidget(self.lbl_status)
         root_layout.addWidget(grp_actions)
@@ -332,13 +623,12 @@ class WhatsAppAnalyzer(QMainWindow):
         )
         if not path:
             return
-        self.messages = parse_whatsapp_export(path)
-        self.lbl_file.setText(f"{path}  ({len(self.messages)} Nachrichten erkannt)")
+        self.store = parse_whatsapp_export(path)
+        self.lbl_file.setText(f"{path}  ({len(self.store)} Nachrichten erkannt)")
 
-        senders = sorted({m["sender"] for m in self.messages})
         self.combo_sender.clear()
         self.combo_sender.addItem("Alle")
-        for s in senders:
+        for s in self.store.sender_names:
             self.combo_sender.addItem(s)
 
         self._apply_filter()
@@ -348,37 +638,41 @@ class WhatsAppAnalyzer(QMainWindow):
         end = self.date_to.date().toPyDate()
         sender_sel = self.combo_sender.currentText()
         senders = None if sender_sel == "Alle" else [sender_sel]
-        self.filtered_messages = filter_messages(self.messages, start, end, senders)
+        self.filtered_idx = filter_messages(self.store, start, end, senders)
         self._render_original()
-        self.lbl_status.setText(f"{len(self.filtered_messages)} Nachrichten im Zeitraum")
+        self.lbl_status.setText(f"{self.filtered_idx.size} Nachrichten im Zeitraum")
 
     def _render_original(self):
-        lines = []
-        for msg in self.filtered_messages:
-            dt_str = msg["datetime"].strftime("%d.%m.%Y %H:%M") if msg["datetime"] else ""
-            prefix = f"[{dt_str}] {msg['sender']}: "
-            if msg["audio_file"]:
-                content = f"🎤 {msg['transcript']}" if msg["transcript"] else "🎤 [Sprachnachricht]"
-            else:
-                content = msg["text"]
-            lines.append(prefix + content)
-        self.txt_original.setPlainText("\n".join(lines))
+        store = self.store
+        prefixes, texts = store.prefixes, store.texts
+        audio_files, transcripts = store.audio_files, store.transcripts
+        self.txt_original.setPlainText("\n".join(
+            prefixes[i] + ("🎤 " + (transcripts[i] or "[Sprachnachricht]")
+                           if audio_files[i] else texts[i])
+            for i in self.filtered_idx.tolist()
+        ))
+
+    def _set_whisper_size(self, size: str):
+        self._whisper_size = size
 
     def _start_transcription(self):
-        if not self.filtered_messages:
+        if not self.filtered_idx.size:
             QMessageBox.warning(self, "Hinweis", "Bitte zuerst Nachrichten filtern.")
             return
-        audio_msgs = [m for m in self.filtered_messages if m["audio_file"]]
-        if not audio_msgs:
+        audio_files = self.store.audio_files
+        jobs = [(i, audio_files[i]) for i in self.filtered_idx.tolist() if audio_files[i]]
+        if not jobs:
             QMessageBox.information(self, "Hinweis", "Keine Sprachnachrichten im Zeitraum gefunden.")
             return
 
         self.btn_transcribe.setEnabled(False)
         self.progress_bar.setVisible(True)
-        self.progress_bar.setMaximum(len(audio_msgs))
+        self.progress_bar.setMaximum(len(jobs))
         self.progress_bar.setValue(0)
 
-        self.worker = TranscriptionWorker(self.filtered_messages)
+        # Geladenes Modell nur wiederverwenden, wenn die Größe noch passt
+        model = self._whisper_model if self._whisper_model_size == self._whisper_size else None
+        self.worker = TranscriptionWorker(jobs, model_size=self._whisper_size, model=model)
         self.worker.progress.connect(lambda cur, _: self.progress_bar.setValue(cur))
         self.worker.message_done.connect(self._on_transcript)
         self.worker.finished.connect(self._on_transcription_done)
@@ -386,29 +680,28 @@ class WhatsAppAnalyzer(QMainWindow):
         self.worker.start()
 
     def _on_transcript(self, index: int, text: str):
-        self.filtered_messages[index]["transcript"] = text
-        # Auch im Original-Datensatz speichern
-        orig = self.filtered_messages[index]
-        for m in self.messages:
-            if m is orig:
-                m["transcript"] = text
+        self.store.transcripts[index] = text
 
     def _on_transcription_done(self):
+        # Modell für weitere Durchläufe behalten (Laden kostet mehrere Sekunden);
+        # es gilt für jede Anzahl Dateien, nur ein Größenwechsel lädt neu
+        self._whisper_model = self.worker.model
+        self._whisper_model_size = self.worker.model_size
         self.btn_transcribe.setEnabled(True)
         self.progress_bar.setVisible(False)
         self._render_original()
         QMessageBox.information(self, "Fertig", "Transkription abgeschlossen.")
 
     def _create_summary(self):
-        if not self.filtered_messages:
+        if not self.filtered_idx.size:
             QMessageBox.warning(self, "Hinweis", "Keine Nachrichten zum Zusammenfassen.")
             return
-        self.summary_text = generate_summary(self.filtered_messages)
+        self.summary_text = generate_summary(self.store, self.filtered_idx)
         self.txt_summary.setPlainText(self.summary_text)
         self.tabs.setCurrentIndex(1)
 
     def _export_pdf(self):
-        if not self.filtered_messages:
+        if not self.filtered_idx.size:
             QMessageBox.warning(self, "Hinweis", "Keine Nachrichten zum Exportieren.")
             return
         path, _ = QFileDialog.getSaveFileName(
@@ -416,11 +709,38 @@ class WhatsAppAnalyzer(QMainWindow):
         )
         if not path:
             return
-        try:
-            export_pdf(path, self.filtered_messages, self.summary_text)
-            QMessageBox.information(self, "Erfolg", f"PDF gespeichert:\n{path}")
-        except Exception as e:
-            QMessageBox.critical(self, "Fehler", f"PDF-Export fehlgeschlagen:\n{e}")
+
+        self.btn_pdf.setEnabled(False)
+        self.lbl_status.setText("PDF wird erstellt …")
+        # Momentaufnahme der Nachrichten, der Export läuft im Hintergrund
+        self.pdf_worker = PDFExportWorker(path, self.store.to_dict_view(self.filtered_idx),
+                                          self.summary_text)
+        self.pdf_worker.finished.connect(self._on_pdf_done)
+        self.pdf_worker.error.connect(self._on_pdf_error)
+        self.pdf_worker.start()
+
+    def _on_pdf_done(self, path: str):
+        self.btn_pdf.setEnabled(True)
+        self.lbl_status.setText(f"{self.filtered_idx.size} Nachrichten im Zeitraum")
+        QMessageBox.information(self, "Erfolg", f"PDF gespeichert:\n{path}")
+
+    def _on_pdf_error(self, message: str):
+        self.btn_pdf.setEnabled(True)
+        self.lbl_status.setText(f"{self.filtered_idx.size} Nachrichten im Zeitraum")
+        QMessageBox.critical(self, "Fehler", f"PDF-Export fehlgeschlagen:\n{message}")
+
+    def closeEvent(self, event):
+        # Laufende QThreads dürfen nicht mit dem Fenster zerstört werden
+        if self.worker is not None and self.worker.isRunning():
+            QMessageBox.warning(self, "Hinweis",
+                                "Die Transkription läuft noch. Bitte warten, bis sie abgeschlossen ist.")
+            event.ignore()
+            return
+        if self.pdf_worker is not None and self.pdf_worker.isRunning():
+            # Der PDF-Export lässt sich nicht abbrechen, dauert aber nur Sekunden
+            self.lbl_status.setText("PDF wird fertiggestellt …")
+            self.pdf_worker.wait()
+        event.accept()
 
 
 # ─────────────────────────────────────────────